@@ -1,6 +1,14 @@
-from flask import Flask, request, jsonify
+from quart import Quart, request, jsonify
+from quart.json.provider import DefaultJSONProvider
+from werkzeug.exceptions import BadRequest, HTTPException
+import orjson
 import os
+import time
+import uuid
+import hashlib
+import math
 import asyncio
+from collections import OrderedDict
 from typing import Dict, Any, Optional
 import logging
 from functools import wraps
@@ -9,6 +17,7 @@ from functools import wraps
 try:
     from futurehouse_client import FutureHouseClient, JobNames
     from futurehouse_client.models.app import TaskRequest
+    import httpx
     FUTUREHOUSE_AVAILABLE = True
 except ImportError as e:
     print(f"Erreur: futurehouse_client n'est pas installé: {e}")
@@ -25,100 +34,586 @@ except ImportError as e:
         PHOENIX = "PHOENIX"
         DUMMY = "DUMMY"
 
-app = Flask(__name__)
+# Jobs disponibles, résolus une seule fois : un dict.get sert à la fois de validation et de résolution
+JOB_MAP = {name: getattr(JobNames, name) for name in ('CROW', 'FALCON', 'OWL', 'PHOENIX', 'DUMMY')}
+VALID_JOBS = list(JOB_MAP)
+
+# Cache Redis optionnel pour les tâches terminées
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Sérialisation JSON via orjson (implémentation C, produit directement des bytes)"""
+    
+    @staticmethod
+    def default(o: Any):
+        # Les réponses du client FutureHouse sont des modèles pydantic
+        if hasattr(o, 'model_dump'):
+            return o.model_dump(mode='json')
+        return DefaultJSONProvider.default(o)
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
 
 # Configuration du logging
-logging.basicConfig(level=logging.INFO)
+# Niveau réglable via LOG_LEVEL (WARNING en production : les logs INFO ne sont alors jamais formatés)
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
 # Configuration
 FUTUREHOUSE_API_KEY = os.getenv('FUTUREHOUSE_API_KEY')
 
+# Pool de connexions HTTP vers FutureHouse
+FH_MAX_CONN = int(os.getenv('FH_MAX_CONN', 200))
+FH_MAX_KEEPALIVE = int(os.getenv('FH_MAX_KEEPALIVE', 100))
+FH_KEEPALIVE_EXPIRY = float(os.getenv('FH_KEEPALIVE_EXPIRY', 60))
+# Nombre de tâches d'un lot créées / interrogées simultanément
+FH_BATCH_CONCURRENCY = int(os.getenv('FH_BATCH_CONCURRENCY', 10))
+# Nombre de lots exécutés simultanément ; les suivants attendent leur tour en état 'pending'
+MAX_RUNNING_BATCHES = int(os.getenv('MAX_RUNNING_BATCHES', min(32, (os.cpu_count() or 4) * 4)))
+
 # Vérification de la clé API
 if not FUTUREHOUSE_API_KEY:
     logger.error("FUTUREHOUSE_API_KEY n'est pas définie dans les variables d'environnement")
     FUTUREHOUSE_AVAILABLE = False
 
-# Initialisation du client FutureHouse
+def tune_connection_pool(fh_client):
+    """Applique les limites de pool configurées au client HTTP asynchrone du client FutureHouse"""
+    # Le client FutureHouse ne permet pas de passer des limites : on les applique au transport
+    # aiohttp du client asynchrone à sa sortie de get_client(), avant sa première requête.
+    # Les clients synchrones sont créés dès FutureHouseClient.__init__ et ne passent pas par ici :
+    # seul le client asynchrone, créé à la demande, est concerné (toutes les routes l'utilisent).
+    limits = httpx.Limits(
+        max_connections=FH_MAX_CONN,
+        max_keepalive_connections=FH_MAX_KEEPALIVE,
+        keepalive_expiry=FH_KEEPALIVE_EXPIRY
+    )
+    get_client = fh_client.get_client
+    
+    @wraps(get_client)
+    def get_pooled_client(*args, **kwargs):
+        http_client = get_client(*args, **kwargs)
+        transport = getattr(http_client, '_transport', None)
+        # Limites lues par le transport aiohttp à la création de sa session
+        if hasattr(transport, 'limits'):
+            transport.limits = limits
+        return http_client
+    
+    fh_client.get_client = get_pooled_client
+
+# Initialisation du client FutureHouse (unique, partagé par toutes les requêtes)
 if FUTUREHOUSE_AVAILABLE and FUTUREHOUSE_API_KEY:
     try:
         client = FutureHouseClient(api_key=FUTUREHOUSE_API_KEY)
+        tune_connection_pool(client)
         logger.info("Client FutureHouse initialisé avec succès")
     except Exception as e:
-        logger.error(f"Erreur lors de l'initialisation du client FutureHouse: {e}")
+        logger.error("Erreur lors de l'initialisation du client FutureHouse: %s", e)
         FUTUREHOUSE_AVAILABLE = False
         client = None
 else:
     client = None
     logger.warning("Client FutureHouse non disponible")
 
-def handle_errors(f):
-    """Décorateur pour gérer les erreurs de façon uniforme"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
+# Initialisation du cache Redis (facultatif : sans REDIS_URL, tout passe par FutureHouse)
+REDIS_URL = os.getenv('REDIS_URL')
+CACHE_TTL = int(os.getenv('CACHE_TTL', 3600))
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 32))
+# Attente maximale d'une connexion libre quand les REDIS_MAX_CONNECTIONS sont toutes utilisées
+REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', 5))
+
+if REDIS_AVAILABLE and REDIS_URL:
+    # Pool bloquant : au-delà de max_connections, une commande attend une connexion libre
+    # au lieu d'échouer immédiatement avec « Too many connections »
+    redis_client = aioredis.Redis.from_pool(aioredis.BlockingConnectionPool.from_url(
+        REDIS_URL,
+        decode_responses=True,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT
+    ))
+    logger.info("Cache Redis configuré")
+else:
+    redis_client = None
+    logger.info("Cache Redis désactivé")
+    if int(os.getenv('WEB_CONCURRENCY', 1)) > 1:
+        # Sans store partagé, chaque worker ne voit que les lots qu'il a lui-même créés
+        logger.warning("Plusieurs workers sans REDIS_URL : /batch/<id> peut répondre 404 depuis un autre worker")
+
+@app.after_serving
+async def close_client():
+    """Ferme les connexions HTTP du client FutureHouse et de Redis à l'arrêt du serveur"""
+    if client is not None and hasattr(client, 'aclose'):
+        await client.aclose()
+    if redis_client is not None:
+        await redis_client.aclose()
+
+# États terminaux des tâches (valeurs historiques + valeurs d'ExecutionStatus du client)
+COMPLETED_STATES = {'completed', 'success', 'finished'}
+FAILED_STATES = {'failed', 'error', 'fail', 'cancelled', 'truncated'}
+TERMINAL_STATES = COMPLETED_STATES | FAILED_STATES
+
+# Polling adaptatif : 5 s après le premier appel, puis x1.5 jusqu'à 60 s maximum
+POLL_MIN_DELAY = 5.0
+POLL_MAX_DELAY = 60.0
+POLL_BACKOFF = 1.5
+# Attente par défaut de /wait : juste sous le délai d'inactivité habituel des reverse proxies (60 s)
+DEFAULT_WAIT_SECONDS = 50
+MAX_WAIT_SECONDS = float(os.getenv('MAX_WAIT_SECONDS', 600))
+
+def parse_wait_seconds(value: Any) -> float:
+    """Convertit une durée d'attente en secondes, bornée entre 0 et MAX_WAIT_SECONDS (ValueError si invalide)"""
+    seconds = float(value)
+    # nan et inf échapperaient au plafond (min(nan, x) vaut nan) : l'attente ne finirait jamais
+    if not math.isfinite(seconds):
+        raise ValueError(f'Durée non finie: {value}')
+    return min(max(seconds, 0.0), MAX_WAIT_SECONDS)
+
+# Nombre maximum de tâches par appel à /tasks/status
+MAX_STATUS_BATCH = int(os.getenv('MAX_STATUS_BATCH', 100))
+
+def task_to_dict(task_info: Any):
+    """Convertit une réponse du client FutureHouse en structure sérialisable en JSON"""
+    if isinstance(task_info, dict):
+        return task_info
+    if hasattr(task_info, 'model_dump'):
+        return task_info.model_dump(mode='json')
+    if hasattr(task_info, '__dict__'):
+        return task_info.__dict__
+    return str(task_info)
+
+def task_status_of(task_info: Any) -> str:
+    """Extrait le statut d'une tâche, qu'elle soit un modèle du client ou un dictionnaire"""
+    if isinstance(task_info, dict):
+        status = task_info.get('status')
+    else:
+        status = getattr(task_info, 'status', None)
+    return str(status) if status else 'unknown'
+
+async def get_cached_task(task_id: str):
+    """Retourne (task_info, task_status) depuis le cache Redis, ou None"""
+    if redis_client is None:
+        return None
+    
+    try:
+        cached = await redis_client.hgetall(f'task:{task_id}')
+    except Exception as e:
+        logger.warning("Lecture du cache impossible pour la tâche %s: %s", task_id, e)
+        return None
+    
+    if not cached:
+        return None
+    return orjson.loads(cached['result']), cached['status']
+
+async def cache_task(task_id: str, task_info: Any, task_status: str):
+    """Met en cache une tâche terminée (statut + résultat sous une seule clé)"""
+    if redis_client is None or task_status.lower() not in TERMINAL_STATES:
+        return
+    
+    key = f'task:{task_id}'
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                'status': task_status,
+                'result': orjson.dumps(task_to_dict(task_info), default=str),
+                'cached_at': time.time()
+            })
+            pipe.expire(key, CACHE_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning("Écriture du cache impossible pour la tâche %s: %s", task_id, e)
+
+async def fetch_task(task_id: str, lite: bool = False):
+    """Récupère une tâche et son statut, depuis le cache si elle est déjà terminée"""
+    cached = await get_cached_task(task_id)
+    if cached is not None:
+        return cached
+    
+    task_info = await client.aget_task(task_id, lite=lite)
+    task_status = task_status_of(task_info)
+    
+    # Seule la version complète d'une tâche terminée est mise en cache
+    if not lite:
+        await cache_task(task_id, task_info, task_status)
+    
+    return task_info, task_status
+
+# Taille maximale des états conservés en mémoire (lots sans Redis, état du polling)
+MEMORY_STORE_MAX = int(os.getenv('MEMORY_STORE_MAX', 10000))
+
+class BoundedStore:
+    """Dictionnaire en mémoire borné : expiration après ttl secondes et éviction des plus anciens au-delà de max_size"""
+    
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        # Clé -> (échéance, valeur), dans l'ordre de dernière écriture : le plus ancien expire en premier
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        if item[0] <= time.monotonic():
+            del self._data[key]
+            return default
+        return item[1]
+    
+    def set(self, key: str, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        self.evict()
+    
+    def pop(self, key: str, default: Any = None) -> Any:
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+    
+    def evict(self):
+        """Retire les entrées expirées puis les plus anciennes tant que la taille maximale est dépassée"""
+        now = time.monotonic()
+        data = self._data
+        while data:
+            expires, _ = next(iter(data.values()))
+            if expires > now and len(data) <= self.max_size:
+                break
+            data.popitem(last=False)
+
+# Lots exécutés en arrière-plan, quand Redis n'est pas configuré (même durée de vie que dans Redis)
+_batches = BoundedStore(MEMORY_STORE_MAX, CACHE_TTL)
+
+async def write_batch(batch_id: str, **fields):
+    """Enregistre l'état d'un lot (Redis si disponible, sinon en mémoire) ; lève l'erreur Redis éventuelle"""
+    if redis_client is None:
+        batch = _batches.get(batch_id) or {}
+        batch.update(fields)
+        _batches.set(batch_id, batch)
+        return
+    
+    key = f'batch:{batch_id}'
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, CACHE_TTL)
+        await pipe.execute()
+
+async def save_batch(batch_id: str, **fields):
+    """Comme write_batch, pour l'exécution en arrière-plan : une erreur Redis est journalisée, pas levée"""
+    try:
+        await write_batch(batch_id, **fields)
+    except Exception as e:
+        logger.error("Écriture impossible de l'état du lot %s: %s", batch_id, e)
+
+async def load_batch(batch_id: str) -> Optional[Dict[str, Any]]:
+    """Retourne l'état d'un lot, ou None s'il est inconnu"""
+    if redis_client is None:
+        return _batches.get(batch_id)
+    
+    batch = await redis_client.hgetall(f'batch:{batch_id}')
+    return batch or None
+
+def batch_success_payload(batch_id: str, results_json: Any, count: int, duration: Any = None) -> Dict[str, Any]:
+    """Construit la réponse /batch/<id> d'un lot terminé avec succès"""
+    # Fragment : le JSON déjà sérialisé des résultats est inséré sans être relu ni réencodé
+    payload = {
+        'status': 'success',
+        'batch_id': batch_id,
+        'results': orjson.Fragment(results_json),
+        'count': count,
+        'message': f'{count} tâches exécutées avec succès'
+    }
+    # Absente des lots enregistrés avant que la durée ne soit mesurée
+    if duration is not None:
+        payload['duration_seconds'] = float(duration)
+    return payload
+
+# Limite les lots en cours : une rafale de POST /task/batch est mise en file au lieu de tout lancer
+_batch_slots = asyncio.Semaphore(MAX_RUNNING_BATCHES)
+
+async def execute_batch(batch_id: str, tasks_data: list):
+    """Exécute un lot de tâches en arrière-plan et enregistre son résultat"""
+    try:
+        async with _batch_slots:
+            await save_batch(batch_id, state='running')
+            # Durée d'exécution mesurée sur l'horloge monotone (insensible aux corrections NTP)
+            started = time.perf_counter()
+            try:
+                results = await client.arun_tasks_until_done(tasks_data, concurrency=FH_BATCH_CONCURRENCY)
+            except Exception as e:
+                logger.error("Erreur lors de l'exécution du lot %s: %s", batch_id, e)
+                await save_batch(batch_id, state='failed', error=str(e))
+                return
+    except asyncio.CancelledError:
+        # Arrêt du serveur : Quart annule les tâches de fond encore actives après
+        # BACKGROUND_TASK_SHUTDOWN_TIMEOUT. Sans cet état, le lot resterait 'pending'/'running'.
+        logger.warning("Lot %s interrompu par l'arrêt du serveur", batch_id)
+        await save_batch(batch_id, state='failed', error="Lot interrompu par l'arrêt du serveur, relancez-le")
+        raise
+    
+    duration = round(time.perf_counter() - started, 3)
+    logger.info("Lot %s terminé: %s tâches en %s s", batch_id, len(results), duration)
+    # Résultats sérialisés une seule fois, à la fin du lot : /batch/<id> les renvoie tels quels
+    results_json = orjson.dumps([task_to_dict(r) for r in results], default=str)
+    await save_batch(batch_id, state='success', results=results_json, count=len(results), duration=duration)
+
+# Exécutions /task/run en cours, partagées entre requêtes identiques simultanées (single-flight)
+_inflight_runs: Dict[str, asyncio.Future] = {}
+RUN_CACHE_TTL = int(os.getenv('RUN_CACHE_TTL', 600))
+
+def run_key(job_name: str, query: str, runtime_config: Any, verbose: bool) -> str:
+    """Empreinte canonique d'une requête /task/run"""
+    payload = orjson.dumps(
+        {'n': job_name, 'q': query, 'r': runtime_config, 'v': verbose},
+        option=orjson.OPT_SORT_KEYS
+    )
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+async def execute_run(key: str, task_data: Dict[str, Any], verbose: bool):
+    """Exécute une tâche jusqu'à completion et met brièvement en cache une réponse réussie"""
+    task_response = await client.arun_tasks_until_done(task_data, verbose=verbose)
+    response = [task_to_dict(r) for r in task_response]
+    
+    succeeded = all(str(getattr(r, 'status', '')).lower() in COMPLETED_STATES for r in task_response)
+    if redis_client is not None and succeeded:
+        try:
+            await redis_client.set(f'run:{key}', orjson.dumps(response, default=str), ex=RUN_CACHE_TTL)
+        except Exception as e:
+            logger.warning("Écriture du cache impossible pour l'exécution %s: %s", key, e)
+    
+    return response
+
+async def run_task_once(key: str, task_data: Dict[str, Any], verbose: bool):
+    """Retourne la réponse d'une exécution, sans relancer une requête identique déjà en cours"""
+    if redis_client is not None:
         try:
-            return f(*args, **kwargs)
+            cached = await redis_client.get(f'run:{key}')
+            if cached:
+                return orjson.loads(cached)
         except Exception as e:
-            logger.error(f"Erreur dans {f.__name__}: {str(e)}")
-            return jsonify({
-                'error': True,
-                'message': str(e),
-                'status': 'error'
-            }), 500
-    return decorated_function
+            logger.warning("Lecture du cache impossible pour l'exécution %s: %s", key, e)
+    
+    future = _inflight_runs.get(key)
+    if future is None:
+        future = asyncio.ensure_future(execute_run(key, task_data, verbose))
+        _inflight_runs[key] = future
+        future.add_done_callback(lambda _: _inflight_runs.pop(key, None))
+    else:
+        logger.info("Exécution identique déjà en cours, réutilisée: %s", key)
+    
+    # shield : si un client se déconnecte, l'exécution partagée continue pour les autres
+    return await asyncio.shield(future)
+
+# État du polling par tâche : dernier statut observé et délai courant.
+# Sert uniquement de délai de départ à un client qui se reconnecte, pour qu'il reprenne au même rythme ;
+# borné pour que les tâches abandonnées en cours de route ne s'accumulent pas.
+_poll_state = BoundedStore(MEMORY_STORE_MAX, CACHE_TTL)
+
+async def poll_task_until_done(task_id: str, max_wait: float):
+    """Interroge une tâche avec un délai croissant jusqu'à un état terminal ou l'échéance"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_wait
+    
+    # Premier appel en version complète : si la tâche est déjà terminée, un seul aller-retour suffit.
+    # Les interrogations suivantes utilisent la version allégée.
+    lite = False
+    # Délai propre à cet appel : plusieurs clients qui attendent la même tâche
+    # ne multiplient pas le délai partagé les uns après les autres
+    delay = None
+    last_status = None
+    while True:
+        task_info, task_status = await fetch_task(task_id, lite=lite)
+        
+        if task_status.lower() in TERMINAL_STATES:
+            _poll_state.pop(task_id, None)
+            if lite:
+                # Récupérer la tâche complète une seule fois, à la fin (ou depuis le cache)
+                return await fetch_task(task_id)
+            return task_info, task_status
+        
+        lite = True
+        if delay is None:
+            # Reprise : même statut qu'au dernier polling, on repart du délai déjà atteint
+            state = _poll_state.get(task_id)
+            delay = state['delay'] if state and state['status'] == task_status else POLL_MIN_DELAY
+        elif task_status != last_status:
+            # Nouveau statut : on repart du délai minimal
+            delay = POLL_MIN_DELAY
+        else:
+            delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
+        last_status = task_status
+        _poll_state.set(task_id, {'status': task_status, 'delay': delay})
+        
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return task_info, task_status
+        
+        await asyncio.sleep(min(delay, remaining))
+
+def build_result_response(task_id: str, task_info: Any, task_status: str):
+    """Construit la réponse /result selon l'état de la tâche"""
+    if task_status.lower() not in TERMINAL_STATES:
+        return jsonify({
+            'status': 'pending',
+            'task_id': task_id,
+            'task_status': task_status,
+            'message': f'Tâche pas encore terminée. Statut actuel: {task_status}',
+            'raw_task_info': task_to_dict(task_info)
+        }), 202  # 202 Accepted - en cours de traitement
+    
+    # Si la tâche a échoué
+    if task_status.lower() in FAILED_STATES:
+        return jsonify({
+            'status': 'failed',
+            'task_id': task_id,
+            'task_status': task_status,
+            'message': f'Tâche échouée. Statut: {task_status}',
+            'raw_task_info': task_to_dict(task_info)
+        }), 200
+    
+    logger.info("Résultat récupéré pour la tâche %s", task_id)
+    
+    response_data = {
+        'status': 'success',
+        'task_id': task_id,
+        'task_status': task_status,
+        'result': task_to_dict(task_info),
+        'message': 'Résultat récupéré avec succès'
+    }
+    
+    return jsonify(response_data)
+
+async def read_json() -> Dict[str, Any]:
+    """Lit le corps JSON de la requête avec orjson, quel que soit son Content-Type"""
+    body = await request.get_data()
+    try:
+        data = orjson.loads(body) if body else None
+    except orjson.JSONDecodeError:
+        data = None
+    
+    if not isinstance(data, dict):
+        raise BadRequest('Données JSON requises')
+    return data
+
+def parse_task(task: Any):
+    """Valide une tâche et construit ses données en une seule passe : retourne (job_name, task_data)"""
+    if not isinstance(task, dict):
+        raise BadRequest('Chaque tâche doit être un objet JSON')
+    
+    job_name = task.get('job_name')
+    query = task.get('query')
+    if not isinstance(job_name, str) or not query:
+        raise BadRequest('Les paramètres job_name et query sont requis')
+    
+    job_name = job_name.upper()
+    job = JOB_MAP.get(job_name)
+    if job is None:
+        raise BadRequest(f'Job invalide: {job_name}. Jobs disponibles: {VALID_JOBS}')
+    
+    task_data = {'name': job, 'query': query}
+    runtime_config = task.get('runtime_config')
+    if runtime_config is not None:
+        task_data['runtime_config'] = runtime_config
+    return job_name, task_data
+
+# Réponses statiques sérialisées une seule fois : /health et /jobs sont appelés très souvent
+# (sondes de monitoring) et leur contenu ne change pas entre deux appels
+_health_bodies: Dict[tuple, bytes] = {}
+
+def health_body() -> bytes:
+    """Retourne le corps JSON de /health, mémorisé pour chaque état possible du service"""
+    state = (FUTUREHOUSE_AVAILABLE, client is not None, redis_client is not None)
+    body = _health_bodies.get(state)
+    if body is None:
+        body = _health_bodies[state] = app.json.dumps({
+            'status': 'healthy',
+            'service': 'FutureHouse API Wrapper',
+            'version': '1.0.0',
+            'futurehouse_client_available': FUTUREHOUSE_AVAILABLE,
+            'api_key_configured': bool(FUTUREHOUSE_API_KEY),
+            'client_initialized': client is not None,
+            'cache_enabled': redis_client is not None
+        }).encode()
+    return body
 
 @app.route('/health', methods=['GET'])
-def health_check():
+async def health_check():
     """Endpoint de vérification de santé"""
-    return jsonify({
-        'status': 'healthy',
-        'service': 'FutureHouse API Wrapper',
-        'version': '1.0.0',
-        'futurehouse_client_available': FUTUREHOUSE_AVAILABLE,
-        'api_key_configured': bool(FUTUREHOUSE_API_KEY),
-        'client_initialized': client is not None
-    })
+    return app.response_class(health_body(), mimetype='application/json')
+
+def fast_health(asgi_app):
+    """Middleware ASGI : répond à GET /health avant le routage Quart (ni contexte, ni décorateurs)"""
+    async def middleware(scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] == '/health':
+            body = health_body()
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode())
+                ]
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+        await asgi_app(scope, receive, send)
+    return middleware
+
+app.asgi_app = fast_health(app.asgi_app)
+
+JOBS = {
+    'CROW': {
+        'name': 'CROW',
+        'description': 'Agent généraliste pour recherche littéraire et réponses citées',
+        'use_case': 'Questions scientifiques générales'
+    },
+    'FALCON': {
+        'name': 'FALCON', 
+        'description': 'Spécialisé pour les revues de littérature approfondies',
+        'use_case': 'Synthèse approfondie de littérature scientifique'
+    },
+    'OWL': {
+        'name': 'OWL',
+        'description': 'Spécialisé pour répondre "Est-ce que quelqu\'un a déjà fait X?"',
+        'use_case': 'Recherche d\'antécédents scientifiques'
+    },
+    'PHOENIX': {
+        'name': 'PHOENIX',
+        'description': 'Agent chimie avec outils cheminformatiques',
+        'use_case': 'Planification de synthèse et conception de molécules'
+    },
+    'DUMMY': {
+        'name': 'DUMMY',
+        'description': 'Tâche de test',
+        'use_case': 'Tests et développement'
+    }
+}
+
+JOBS_BODY = app.json.dumps({
+    'status': 'success',
+    'jobs': JOBS
+}).encode()
 
 @app.route('/jobs', methods=['GET'])
-@handle_errors
-def get_available_jobs():
+async def get_available_jobs():
     """Retourne la liste des jobs disponibles"""
-    jobs = {
-        'CROW': {
-            'name': 'CROW',
-            'description': 'Agent généraliste pour recherche littéraire et réponses citées',
-            'use_case': 'Questions scientifiques générales'
-        },
-        'FALCON': {
-            'name': 'FALCON', 
-            'description': 'Spécialisé pour les revues de littérature approfondies',
-            'use_case': 'Synthèse approfondie de littérature scientifique'
-        },
-        'OWL': {
-            'name': 'OWL',
-            'description': 'Spécialisé pour répondre "Est-ce que quelqu\'un a déjà fait X?"',
-            'use_case': 'Recherche d\'antécédents scientifiques'
-        },
-        'PHOENIX': {
-            'name': 'PHOENIX',
-            'description': 'Agent chimie avec outils cheminformatiques',
-            'use_case': 'Planification de synthèse et conception de molécules'
-        },
-        'DUMMY': {
-            'name': 'DUMMY',
-            'description': 'Tâche de test',
-            'use_case': 'Tests et développement'
-        }
-    }
-    
-    return jsonify({
-        'status': 'success',
-        'jobs': jobs
-    })
+    return app.response_class(JOBS_BODY, mimetype='application/json')
 
 @app.route('/task', methods=['POST'])
-@handle_errors
-def create_task():
+async def create_task():
     """Crée une nouvelle tâche FutureHouse (asynchrone)"""
     
     # Vérifier que le client est disponible
@@ -128,51 +623,21 @@ def create_task():
             'message': 'Client FutureHouse non disponible'
         }), 503
     
-    data = request.get_json()
+    data = await read_json()
     
-    if not data:
-        return jsonify({
-            'error': True,
-            'message': 'Données JSON requises'
-        }), 400
-    
-    # Validation des paramètres requis
-    if 'job_name' not in data or 'query' not in data:
-        return jsonify({
-            'error': True,
-            'message': 'Les paramètres job_name et query sont requis'
-        }), 400
-    
-    job_name = data['job_name'].upper()
-    query = data['query']
-    
-    # Validation du nom du job
-    valid_jobs = ['CROW', 'FALCON', 'OWL', 'PHOENIX', 'DUMMY']
-    if job_name not in valid_jobs:
-        return jsonify({
-            'error': True,
-            'message': f'Job invalide. Jobs disponibles: {valid_jobs}'
-        }), 400
+    # Validation des paramètres et construction des données de la tâche
+    job_name, task_data = parse_task(data)
+    query = task_data['query']
     
     try:
-        # Construire les données de la tâche
-        task_data = {
-            'name': getattr(JobNames, job_name),
-            'query': query
-        }
-        
-        # Ajouter une configuration runtime si fournie
-        if 'runtime_config' in data:
-            task_data['runtime_config'] = data['runtime_config']
-        
         # Ajouter un ID de tâche personnalisé si fourni
         if 'task_id' in data:
             task_data['task_id'] = data['task_id']
         
         # Créer la tâche (ne l'exécute pas, juste la créé)
-        task_id = client.create_task(task_data)
+        task_id = await client.acreate_task(task_data)
         
-        logger.info(f"Tâche créée avec l'ID: {task_id}")
+        logger.info("Tâche créée avec l'ID: %s", task_id)
         
         return jsonify({
             'status': 'success',
@@ -183,15 +648,14 @@ def create_task():
         })
         
     except Exception as e:
-        logger.error(f"Erreur lors de la création de la tâche: {str(e)}")
+        logger.error("Erreur lors de la création de la tâche: %s", e)
         return jsonify({
             'error': True,
             'message': f'Erreur lors de la création de la tâche: {str(e)}'
         }), 500
 
 @app.route('/task/<task_id>/status', methods=['GET'])
-@handle_errors
-def get_task_status(task_id):
+async def get_task_status(task_id):
     """Récupère le statut d'une tâche"""
     
     # Vérifier que le client est disponible
@@ -203,16 +667,13 @@ def get_task_status(task_id):
     
     try:
         # Utiliser get_task() qui retourne les informations complètes incluant le statut
-        task_info = client.get_task(task_id)
-        
-        # Extraire le statut de la réponse
-        task_status = getattr(task_info, 'status', 'unknown')
+        # (servies depuis le cache si la tâche est déjà terminée)
+        task_info, task_status = await fetch_task(task_id)
         
         # Déterminer si la tâche est terminée
-        completed_states = ['completed', 'success', 'failed', 'error', 'finished']
-        is_completed = task_status.lower() in completed_states
+        is_completed = task_status.lower() in TERMINAL_STATES
         
-        logger.info(f"Statut de la tâche {task_id}: {task_status}")
+        logger.info("Statut de la tâche %s: %s", task_id, task_status)
         
         return jsonify({
             'status': 'success',
@@ -220,11 +681,11 @@ def get_task_status(task_id):
             'task_status': task_status,
             'is_completed': is_completed,
             'message': f'Statut: {task_status}',
-            'raw_task_info': task_info.__dict__ if hasattr(task_info, '__dict__') else str(task_info)
+            'raw_task_info': task_to_dict(task_info)
         })
         
     except Exception as e:
-        logger.error(f"Erreur lors de la récupération du statut de la tâche {task_id}: {str(e)}")
+        logger.error("Erreur lors de la récupération du statut de la tâche %s: %s", task_id, e)
         return jsonify({
             'error': True,
             'message': f'Erreur lors de la récupération du statut: {str(e)}',
@@ -232,8 +693,7 @@ def get_task_status(task_id):
         }), 500
 
 @app.route('/task/<task_id>/result', methods=['GET'])
-@handle_errors
-def get_task_result(task_id):
+async def get_task_result(task_id):
     """Récupère le résultat d'une tâche"""
     
     # Vérifier que le client est disponible
@@ -243,62 +703,131 @@ def get_task_result(task_id):
             'message': 'Client FutureHouse non disponible'
         }), 503
     
+    # Long polling optionnel : durée (en secondes) pendant laquelle la requête
+    # reste ouverte en attendant la fin de la tâche avant de répondre 202
+    try:
+        wait = parse_wait_seconds(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({
+            'error': True,
+            'message': 'Le paramètre wait doit être un nombre de secondes'
+        }), 400
+    
     try:
         # Paramètre optionnel pour récupérer les détails verbeux
         verbose = request.args.get('verbose', 'false').lower() == 'true'
         
-        # Récupérer les informations complètes de la tâche
-        task_info = client.get_task(task_id)
+        if wait > 0:
+            task_info, task_status = await poll_task_until_done(task_id, wait)
+        else:
+            # Récupérer les informations complètes de la tâche (cache ou FutureHouse)
+            task_info, task_status = await fetch_task(task_id)
         
-        # Extraire le statut
-        task_status = getattr(task_info, 'status', 'unknown')
+        return build_result_response(task_id, task_info, task_status)
         
-        # Vérifier si la tâche est terminée
-        completed_states = ['completed', 'success', 'finished']
-        failed_states = ['failed', 'error']
-        
-        if task_status.lower() not in completed_states and task_status.lower() not in failed_states:
-            return jsonify({
-                'status': 'pending',
-                'task_id': task_id,
-                'task_status': task_status,
-                'message': f'Tâche pas encore terminée. Statut actuel: {task_status}',
-                'raw_task_info': task_info.__dict__ if hasattr(task_info, '__dict__') else str(task_info)
-            }), 202  # 202 Accepted - en cours de traitement
+    except Exception as e:
+        logger.error("Erreur lors de la récupération du résultat de la tâche %s: %s", task_id, e)
+        return jsonify({
+            'error': True,
+            'message': f'Erreur lors de la récupération du résultat: {str(e)}',
+            'task_id': task_id
+        }), 500
+
+@app.route('/task/<task_id>/wait', methods=['GET'])
+async def wait_for_task(task_id):
+    """Attend la fin d'une tâche (polling adaptatif côté serveur) et retourne son résultat"""
+    
+    # Vérifier que le client est disponible
+    if not FUTUREHOUSE_AVAILABLE or not client:
+        return jsonify({
+            'error': True,
+            'message': 'Client FutureHouse non disponible'
+        }), 503
+    
+    try:
+        max_wait = parse_wait_seconds(request.args.get('max_wait', DEFAULT_WAIT_SECONDS))
+    except ValueError:
+        return jsonify({
+            'error': True,
+            'message': 'Le paramètre max_wait doit être un nombre de secondes'
+        }), 400
+    
+    try:
+        task_info, task_status = await poll_task_until_done(task_id, max_wait)
         
-        # Si la tâche a échoué
-        if task_status.lower() in failed_states:
-            return jsonify({
-                'status': 'failed',
-                'task_id': task_id,
-                'task_status': task_status,
-                'message': f'Tâche échouée. Statut: {task_status}',
-                'raw_task_info': task_info.__dict__ if hasattr(task_info, '__dict__') else str(task_info)
-            }), 200
+        logger.info("Attente terminée pour la tâche %s: %s", task_id, task_status)
         
-        logger.info(f"Résultat récupéré pour la tâche {task_id}")
-        
-        response_data = {
-            'status': 'success',
-            'task_id': task_id,
-            'task_status': task_status,
-            'result': task_info,
-            'message': 'Résultat récupéré avec succès'
-        }
-        
-        return jsonify(response_data)
+        return build_result_response(task_id, task_info, task_status)
         
     except Exception as e:
-        logger.error(f"Erreur lors de la récupération du résultat de la tâche {task_id}: {str(e)}")
+        logger.error("Erreur lors de l'attente de la tâche %s: %s", task_id, e)
         return jsonify({
             'error': True,
-            'message': f'Erreur lors de la récupération du résultat: {str(e)}',
+            'message': f'Erreur lors de l\'attente de la tâche: {str(e)}',
             'task_id': task_id
         }), 500
 
+@app.route('/tasks/status', methods=['POST'])
+async def get_tasks_status():
+    """Récupère le statut de plusieurs tâches en un seul appel (requêtes FutureHouse en parallèle)"""
+    
+    # Vérifier que le client est disponible
+    if not FUTUREHOUSE_AVAILABLE or not client:
+        return jsonify({
+            'error': True,
+            'message': 'Client FutureHouse non disponible'
+        }), 503
+    
+    data = await read_json()
+    task_ids = data.get('task_ids')
+    
+    if not isinstance(task_ids, list) or not task_ids:
+        return jsonify({
+            'error': True,
+            'message': 'Une liste task_ids est requise'
+        }), 400
+    
+    if not all(isinstance(task_id, str) and task_id for task_id in task_ids):
+        return jsonify({
+            'error': True,
+            'message': 'Chaque task_id doit être une chaîne non vide'
+        }), 400
+    
+    # Un identifiant répété n'est interrogé qu'une fois (ordre de la requête conservé)
+    task_ids = list(dict.fromkeys(task_ids))
+    
+    if len(task_ids) > MAX_STATUS_BATCH:
+        return jsonify({
+            'error': True,
+            'message': f'Trop de tâches demandées ({len(task_ids)}). Maximum: {MAX_STATUS_BATCH}'
+        }), 400
+    
+    # Une requête par tâche, toutes en parallèle sur le pool de connexions partagé
+    results = await asyncio.gather(
+        *[fetch_task(task_id, lite=True) for task_id in task_ids],
+        return_exceptions=True
+    )
+    
+    tasks = {}
+    for task_id, result in zip(task_ids, results):
+        # BaseException : gather peut aussi renvoyer un CancelledError
+        if isinstance(result, BaseException):
+            tasks[task_id] = {'error': True, 'message': str(result) or type(result).__name__}
+            continue
+        task_status = result[1]
+        tasks[task_id] = {
+            'task_status': task_status,
+            'is_completed': task_status.lower() in TERMINAL_STATES
+        }
+    
+    return jsonify({
+        'status': 'success',
+        'count': len(tasks),
+        'tasks': tasks
+    })
+
 @app.route('/task/test', methods=['POST'])
-@handle_errors
-def test_task():
+async def test_task():
     """Test simple avec l'agent DUMMY"""
     
     # Vérifier que le client est disponible
@@ -316,7 +845,7 @@ def test_task():
         }
         
         logger.info("Test de l'agent DUMMY")
-        task_response = client.run_tasks_until_done(task_data, verbose=False)
+        task_response = await client.arun_tasks_until_done(task_data, verbose=False)
         logger.info("Test DUMMY réussi")
         
         return jsonify({
@@ -326,15 +855,14 @@ def test_task():
         })
         
     except Exception as e:
-        logger.error(f"Erreur lors du test DUMMY: {str(e)}")
+        logger.error("Erreur lors du test DUMMY: %s", e)
         return jsonify({
             'error': True,
             'message': f'Erreur lors du test: {str(e)}'
         }), 500
 
 @app.route('/task/run', methods=['POST'])
-@handle_errors
-def run_task_until_done():
+async def run_task_until_done():
     """Crée et exécute une tâche jusqu'à completion"""
     
     # Vérifier que le client est disponible
@@ -346,48 +874,19 @@ def run_task_until_done():
             'client_initialized': client is not None
         }), 503
     
-    data = request.get_json()
-    
-    if not data:
-        return jsonify({
-            'error': True,
-            'message': 'Données JSON requises'
-        }), 400
-    
-    # Validation des paramètres
-    if 'job_name' not in data or 'query' not in data:
-        return jsonify({
-            'error': True,
-            'message': 'Les paramètres job_name et query sont requis'
-        }), 400
+    data = await read_json()
     
-    job_name = data['job_name'].upper()
-    query = data['query']
+    # Validation des paramètres et construction des données de la tâche
+    job_name, task_data = parse_task(data)
+    query = task_data['query']
     verbose = data.get('verbose', False)
     
-    # Validation du nom du job
-    valid_jobs = ['CROW', 'FALCON', 'OWL', 'PHOENIX', 'DUMMY']
-    if job_name not in valid_jobs:
-        return jsonify({
-            'error': True,
-            'message': f'Job invalide. Jobs disponibles: {valid_jobs}'
-        }), 400
-    
-    # Construire les données de la tâche
-    task_data = {
-        'name': getattr(JobNames, job_name),
-        'query': query
-    }
-    
-    # Ajouter configuration runtime si fournie
-    if 'runtime_config' in data:
-        task_data['runtime_config'] = data['runtime_config']
-    
     # Exécuter la tâche jusqu'à completion
     try:
-        logger.info(f"Démarrage de la tâche {job_name} avec la requête: {query}")
-        task_response = client.run_tasks_until_done(task_data, verbose=verbose)
-        logger.info(f"Tâche {job_name} complétée avec succès")
+        logger.info("Démarrage de la tâche %s avec la requête: %s", job_name, query)
+        key = run_key(job_name, query, task_data.get('runtime_config'), verbose)
+        task_response = await run_task_once(key, task_data, verbose)
+        logger.info("Tâche %s complétée avec succès", job_name)
         
         return jsonify({
             'status': 'success',
@@ -398,7 +897,7 @@ def run_task_until_done():
         })
         
     except Exception as e:
-        logger.error(f"Erreur lors de l'exécution de la tâche {job_name}: {str(e)}")
+        logger.error("Erreur lors de l'exécution de la tâche %s: %s", job_name, e)
         return jsonify({
             'error': True,
             'message': f'Erreur lors de l\'exécution de la tâche: {str(e)}',
@@ -407,64 +906,117 @@ def run_task_until_done():
         }), 500
 
 @app.route('/task/batch', methods=['POST'])
-@handle_errors
-def run_batch_tasks():
-    """Exécute plusieurs tâches en parallèle"""
-    data = request.get_json()
+async def run_batch_tasks():
+    """Lance plusieurs tâches en parallèle, en arrière-plan"""
+    
+    # Vérifier que le client est disponible
+    if not FUTUREHOUSE_AVAILABLE or not client:
+        return jsonify({
+            'error': True,
+            'message': 'Client FutureHouse non disponible'
+        }), 503
     
-    if not data or 'tasks' not in data:
+    data = await read_json()
+    tasks = data.get('tasks')
+    
+    if not isinstance(tasks, list) or not tasks:
         return jsonify({
             'error': True,
             'message': 'Une liste de tâches est requise'
         }), 400
     
-    tasks_data = []
-    for task in data['tasks']:
-        if 'job_name' not in task or 'query' not in task:
-            return jsonify({
-                'error': True,
-                'message': 'Chaque tâche doit avoir job_name et query'
-            }), 400
-        
-        job_name = task['job_name'].upper()
-        valid_jobs = ['CROW', 'FALCON', 'OWL', 'PHOENIX', 'DUMMY']
-        if job_name not in valid_jobs:
-            return jsonify({
-                'error': True,
-                'message': f'Job invalide: {job_name}. Jobs disponibles: {valid_jobs}'
-            }), 400
-        
-        task_data = {
-            'name': getattr(JobNames, job_name),
-            'query': task['query']
-        }
-        
-        if 'runtime_config' in task:
-            task_data['runtime_config'] = task['runtime_config']
-            
-        tasks_data.append(task_data)
-    
-    # Exécuter les tâches en lot de façon asynchrone
-    async def run_async_batch():
-        return await client.arun_tasks_until_done(tasks_data)
-    
-    # Exécuter le batch de façon asynchrone
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    # Une seule passe de validation / construction pour l'ensemble du lot
+    tasks_data = [parse_task(task)[1] for task in tasks]
+    
+    # Le lot s'exécute en arrière-plan : la requête rend la main immédiatement
+    batch_id = str(uuid.uuid4())
     try:
-        results = loop.run_until_complete(run_async_batch())
-    finally:
-        loop.close()
+        await write_batch(batch_id, state='pending', count=len(tasks_data), created_at=time.time())
+    except Exception as e:
+        # Lot non enregistré : inutile de lancer un travail dont personne ne pourrait lire le résultat
+        logger.error("Création impossible du lot %s: %s", batch_id, e)
+        return jsonify({
+            'error': True,
+            'message': 'Stockage des lots indisponible, réessayez plus tard'
+        }), 503
+    
+    app.add_background_task(execute_batch, batch_id, tasks_data)
+    
+    logger.info("Lot %s créé avec %s tâches", batch_id, len(tasks_data))
     
     return jsonify({
-        'status': 'success',
-        'results': results,
-        'count': len(results),
-        'message': f'{len(results)} tâches exécutées avec succès'
-    })
+        'status': 'accepted',
+        'batch_id': batch_id,
+        'count': len(tasks_data),
+        'message': f'Lot de {len(tasks_data)} tâches créé. Utilisez /batch/{batch_id} pour suivre le progrès.'
+    }), 202
+
+@app.route('/batch/<batch_id>', methods=['GET'])
+async def get_batch_status(batch_id):
+    """Récupère l'état et, une fois terminé, les résultats d'un lot"""
+    try:
+        batch = await load_batch(batch_id)
+    except Exception as e:
+        logger.error("Lecture impossible de l'état du lot %s: %s", batch_id, e)
+        return jsonify({
+            'error': True,
+            'message': 'Stockage des lots indisponible, réessayez plus tard',
+            'batch_id': batch_id
+        }), 503
+    
+    if batch is None:
+        return jsonify({
+            'error': True,
+            'message': f'Lot inconnu ou expiré: {batch_id}',
+            'batch_id': batch_id
+        }), 404
+    
+    state = batch.get('state')
+    # Date de création (horodatage Unix), enregistrée par /task/batch ; Redis la renvoie en chaîne
+    created_at = batch.get('created_at')
+    created_at = float(created_at) if created_at is not None else None
+    
+    if state == 'failed':
+        return jsonify({
+            'status': 'failed',
+            'batch_id': batch_id,
+            'created_at': created_at,
+            'message': f'Échec du lot: {batch.get("error")}'
+        }), 200
+    
+    if state != 'success':
+        return jsonify({
+            'status': 'pending',
+            'batch_id': batch_id,
+            'batch_state': state,
+            'created_at': created_at,
+            'message': f'Lot pas encore terminé. État actuel: {state}'
+        }), 202  # 202 Accepted - en cours de traitement
+    
+    response = batch_success_payload(batch_id, batch['results'], int(batch['count']), batch.get('duration'))
+    response['created_at'] = created_at
+    return jsonify(response)
+
+@app.errorhandler(HTTPException)
+async def http_error(error):
+    """Erreurs HTTP (400 de validation, 405, ...) : réponse JSON avec le code d'origine"""
+    return jsonify({
+        'error': True,
+        'message': error.description
+    }), error.code
+
+@app.errorhandler(Exception)
+async def unexpected_error(error):
+    """Exceptions non gérées par les routes : appelé uniquement en cas d'erreur"""
+    logger.exception("Erreur lors du traitement de %s", request.path)
+    return jsonify({
+        'error': True,
+        'message': str(error),
+        'status': 'error'
+    }), 500
 
 @app.errorhandler(404)
-def not_found(error):
+async def not_found(error):
     return jsonify({
         'error': True,
         'message': 'Endpoint non trouvé',
@@ -472,7 +1024,7 @@ def not_found(error):
     }), 404
 
 @app.errorhandler(500)
-def internal_error(error):
+async def internal_error(error):
     return jsonify({
         'error': True,
         'message': 'Erreur interne du serveur',
@@ -483,5 +1035,20 @@ if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('DEBUG', 'False').lower() == 'true'
     
-    logger.info(f"Démarrage de l'API FutureHouse sur le port {port}")
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    logger.info("Démarrage de l'API FutureHouse sur le port %s", port)
+    if debug:
+        # Serveur de développement Quart (rechargement automatique, traces détaillées)
+        app.run(host='0.0.0.0', port=port, debug=True)
+    else:
+        # Hors développement : même serveur qu'en production (voir Dockerfile)
+        from hypercorn.asyncio import serve
+        from hypercorn.config import Config
+        
+        config = Config()
+        config.bind = [f'0.0.0.0:{port}']
+        config.keep_alive_timeout = float(os.getenv('KEEP_ALIVE', 30))
+        try:
+            import uvloop
+            uvloop.run(serve(app, config))
+        except ImportError:
+            asyncio.run(serve(app, config))